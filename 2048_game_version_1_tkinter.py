@@ -1,27 +1,87 @@
 import tkinter as tk
 import random
-import copy
+from collections import deque
+
+def _slide_left(row):
+    tiles = [v for v in row if v != 0]
+    new_row = []
+    gained = 0
+    i = 0
+    while i < len(tiles):
+        if i + 1 < len(tiles) and tiles[i] == tiles[i+1]:
+            new_row.append(tiles[i] * 2)
+            gained += tiles[i] * 2
+            i += 2
+        else:
+            new_row.append(tiles[i])
+            i += 1
+    return tuple(new_row) + (0,) * (len(row) - len(new_row)), gained
+
+# row tuple -> (row after sliding left, points gained), filled on first use
+_LEFT_TABLE = {}
+
+def _build_move_kernel(lines):
+    # Unrolls the per-line table lookups for one direction into a single
+    # straight-line function: kernel(grid) -> (gained, empty_mask, changed)
+    size = len(lines)
+    src = [
+        "def kernel(grid):",
+        "    " + "".join(f"g{r}, " for r in range(size)) + "= grid",
+        "    gained = 0",
+        "    empty_mask = 0",
+        "    changed = False",
+    ]
+    for line in lines:
+        cells = "".join(f"g{r}[{c}], " for r, c, _ in line)
+        # zeros always trail a slid line, so its empty bits depend only on their count
+        tail_masks = tuple(sum(bit for _, _, bit in line[size - n:]) for n in range(size + 1))
+        src += [
+            f"    key = ({cells})",
+            "    result = get(key)",
+            "    if result is None:",
+            "        result = table[key] = slide(key)",
+            "    new_line, points = result",
+            "    gained += points",
+            "    if new_line != key:",
+            "        changed = True",
+            f"        {cells}= new_line",
+            f"    empty_mask |= {tail_masks!r}[new_line.count(0)]",
+        ]
+    src.append("    return gained, empty_mask, changed")
+    namespace = {"table": _LEFT_TABLE, "get": _LEFT_TABLE.get, "slide": _slide_left}
+    exec("\n".join(src), namespace)
+    return namespace["kernel"]
+
+# board size -> {direction: kernel}
+_MOVE_KERNELS = {}
 
 class Game2048:
+    __slots__ = ('size', 'score', 'game_over', 'grid', 'empty_mask', 'kernels', 'undo_stack', 'redo_stack')
+
+    HISTORY_LIMIT = 256
+
     def __init__(self, size=4):
         self.size = size
         self.score = 0
         self.game_over = False
         self.grid = [[0] * size for _ in range(size)]
+        self.empty_mask = (1 << (size * size)) - 1
+        self.kernels = self._get_kernels()
         
-        self.undo_stack = []
-        self.redo_stack = []
+        self.undo_stack = deque(maxlen=self.HISTORY_LIMIT)
+        self.redo_stack = deque(maxlen=self.HISTORY_LIMIT)
 
         self.add_new_tile()
         self.add_new_tile()
         self.save_state()
 
     def get_state(self):
-        return (copy.deepcopy(self.grid), self.score, self.game_over)
+        return (tuple(map(tuple, self.grid)), self.score, self.game_over)
 
     def set_state(self, state):
         grid, score, game_over = state
-        self.grid = grid
+        self.grid = [list(row) for row in grid]
+        self.empty_mask = self._scan_empty_mask()
         self.score = score
         self.game_over = game_over
 
@@ -31,8 +91,7 @@ class Game2048:
 
     def undo(self):
         if len(self.undo_stack) > 1:
-            self.redo_stack.append(self.get_state())
-            self.undo_stack.pop()
+            self.redo_stack.append(self.undo_stack.pop())
             last_state = self.undo_stack[-1]
             self.set_state(last_state)
             return True
@@ -42,73 +101,69 @@ class Game2048:
         if self.redo_stack:
             next_state = self.redo_stack.pop()
             self.set_state(next_state)
-            self.undo_stack.append(self.get_state())
+            self.undo_stack.append(next_state)
             return True
         return False
 
     def get_empty_cells(self):
         return [(r, c) for r in range(self.size) for c in range(self.size) if self.grid[r][c] == 0]
 
+    def _scan_empty_mask(self):
+        mask = 0
+        for r, c in self.get_empty_cells():
+            mask |= 1 << (r * self.size + c)
+        return mask
+
     def add_new_tile(self):
-        empty_cells = self.get_empty_cells()
-        if empty_cells:
-            r, c = random.choice(empty_cells)
+        mask = self.empty_mask
+        if mask:
+            # skip a random number of empty cells, then take the lowest one left
+            for _ in range(random.randrange(mask.bit_count())):
+                mask &= mask - 1
+            bit = mask & -mask
+            self.empty_mask ^= bit
+            r, c = divmod(bit.bit_length() - 1, self.size)
             self.grid[r][c] = 2 if random.random() < 0.9 else 4
 
-    def _compress(self, row):
-        new_row = [i for i in row if i != 0]
-        return new_row + [0] * (self.size - len(new_row))
-
-    def _merge(self, row):
-        row = self._compress(row)
-        for i in range(self.size - 1):
-            if row[i] != 0 and row[i] == row[i+1]:
-                row[i] *= 2
-                self.score += row[i]
-                row[i+1] = 0
-        return self._compress(row)
-
-    def _transpose(self):
-        self.grid = [list(t) for t in zip(*self.grid)]
+    def _get_kernels(self):
+        kernels = _MOVE_KERNELS.get(self.size)
+        if kernels is None:
+            kernels = _MOVE_KERNELS[self.size] = {
+                direction: _build_move_kernel(lines) for direction, lines in self._build_lines().items()
+            }
+        return kernels
 
-    def _reverse(self):
-        self.grid = [row[::-1] for row in self.grid]
+    def _build_lines(self):
+        def cell(r, c):
+            return (r, c, 1 << (r * self.size + c))
+        rows = [[cell(r, c) for c in range(self.size)] for r in range(self.size)]
+        cols = [[cell(r, c) for r in range(self.size)] for c in range(self.size)]
+        return {
+            'left': rows,
+            'right': [line[::-1] for line in rows],
+            'up': cols,
+            'down': [line[::-1] for line in cols],
+        }
 
     def move(self, direction):
-        if self.game_over:
+        if self.game_over or direction not in self.kernels:
             return
 
-        original_grid = copy.deepcopy(self.grid)
-
-        if direction == 'left':
-            self.grid = [self._merge(row) for row in self.grid]
-        elif direction == 'right':
-            self._reverse()
-            self.grid = [self._merge(row) for row in self.grid]
-            self._reverse()
-        elif direction == 'up':
-            self._transpose()
-            self.grid = [self._merge(row) for row in self.grid]
-            self._transpose()
-        elif direction == 'down':
-            self._transpose()
-            self._reverse()
-            self.grid = [self._merge(row) for row in self.grid]
-            self._reverse()
-            self._transpose()
-
-        if self.grid != original_grid:
+        gained, self.empty_mask, changed = self.kernels[direction](self.grid)
+        self.score += gained
+
+        if changed:
             self.add_new_tile()
-            self.save_state()
             if not self.can_move():
                 self.game_over = True
+            self.save_state()
     
     def can_move(self):
-        if self.get_empty_cells(): return True
-        for r in range(self.size):
-            for c in range(self.size):
-                if c < self.size - 1 and self.grid[r][c] == self.grid[r][c+1]: return True
-                if r < self.size - 1 and self.grid[r][c] == self.grid[r+1][c]: return True
+        if self.empty_mask: return True
+        for row in self.grid:
+            if any(a == b for a, b in zip(row, row[1:])): return True
+        for upper, lower in zip(self.grid, self.grid[1:]):
+            if any(a == b for a, b in zip(upper, lower)): return True
         return False
 
 class GameGUI(tk.Tk):
@@ -122,6 +177,7 @@ class GameGUI(tk.Tk):
         256: "#edcc61", 512: "#edc850", 1024: "#edc53f", 2048: "#edc22e",
         4096: "#3c3a32"
     }
+    LIGHT_TILE_VALUES = frozenset((2, 4))
 
     def __init__(self):
         super().__init__()
@@ -136,6 +192,8 @@ class GameGUI(tk.Tk):
         
         self.canvas = tk.Canvas(self, width=self.grid_size, height=self.grid_size, bg="#bbada0")
         self.canvas.pack(pady=(0, 10), padx=20)
+        self._create_cells()
+        self._drawn_grid = None
         
         button_frame = tk.Frame(self)
         button_frame.pack(pady=(0, 20))
@@ -153,32 +211,44 @@ class GameGUI(tk.Tk):
         return self.COLORS.get(value, self.COLORS[4096])
 
     def get_text_color(self, value):
-        return "#776e65" if value in [2, 4] else "#f9f6f2"
+        return "#776e65" if value in self.LIGHT_TILE_VALUES else "#f9f6f2"
 
-    def draw_grid(self):
-        self.canvas.delete("all")
+    def _create_cells(self):
+        self._rect_ids = []
+        self._text_ids = []
         for r in range(self.game.size):
+            rect_row = []
+            text_row = []
             for c in range(self.game.size):
                 x1 = c * self.CELL_SIZE + (c + 1) * self.CELL_PADDING
                 y1 = r * self.CELL_SIZE + (r + 1) * self.CELL_PADDING
                 x2 = x1 + self.CELL_SIZE
                 y2 = y1 + self.CELL_SIZE
-                
+                rect_row.append(self.canvas.create_rectangle(x1, y1, x2, y2, fill=self.get_color(0), outline=""))
+                text_row.append(self.canvas.create_text(x1 + self.CELL_SIZE/2, y1 + self.CELL_SIZE/2, 
+                                                        text="", font=self.FONT))
+            self._rect_ids.append(rect_row)
+            self._text_ids.append(text_row)
+
+    def draw_grid(self):
+        self.canvas.delete("game_over")
+        for r in range(self.game.size):
+            for c in range(self.game.size):
                 value = self.game.grid[r][c]
-                color = self.get_color(value)
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="")
+                if self._drawn_grid is not None and self._drawn_grid[r][c] == value:
+                    continue
                 
-                if value != 0:
-                    text_color = self.get_text_color(value)
-                    self.canvas.create_text(x1 + self.CELL_SIZE/2, y1 + self.CELL_SIZE/2, 
-                                            text=str(value), font=self.FONT, fill=text_color)
+                self.canvas.itemconfigure(self._rect_ids[r][c], fill=self.get_color(value))
+                self.canvas.itemconfigure(self._text_ids[r][c], text=str(value) if value != 0 else "",
+                                          fill=self.get_text_color(value))
+        self._drawn_grid = tuple(map(tuple, self.game.grid))
         
         self.score_label.config(text=f"Score: {self.game.score}")
 
         if self.game.game_over:
-            self.canvas.create_rectangle(0, 0, self.grid_size, self.grid_size, fill="#eee4da", stipple="gray50")
+            self.canvas.create_rectangle(0, 0, self.grid_size, self.grid_size, fill="#eee4da", stipple="gray50", tags="game_over")
             self.canvas.create_text(self.grid_size/2, self.grid_size/2, 
-                                    text="Game Over!", font=("Helvetica", 48, "bold"), fill="#776e65")
+                                    text="Game Over!", font=("Helvetica", 48, "bold"), fill="#776e65", tags="game_over")
         
         self.update_button_states()
 
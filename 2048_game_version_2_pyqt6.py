@@ -1,30 +1,90 @@
 import sys
 import random
-import copy
+from collections import deque
 from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
-from PyQt6.QtGui import QPainter, QColor, QFont, QPen
+from PyQt6.QtGui import QPainter, QColor, QFont, QPen, QBrush, QPixmap
 from PyQt6.QtCore import Qt, QRect
 
+def _slide_left(row):
+    tiles = [v for v in row if v != 0]
+    new_row = []
+    gained = 0
+    i = 0
+    while i < len(tiles):
+        if i + 1 < len(tiles) and tiles[i] == tiles[i+1]:
+            new_row.append(tiles[i] * 2)
+            gained += tiles[i] * 2
+            i += 2
+        else:
+            new_row.append(tiles[i])
+            i += 1
+    return tuple(new_row) + (0,) * (len(row) - len(new_row)), gained
+
+# row tuple -> (row after sliding left, points gained), filled on first use
+_LEFT_TABLE = {}
+
+def _build_move_kernel(lines):
+    # Unrolls the per-line table lookups for one direction into a single
+    # straight-line function: kernel(grid) -> (gained, empty_mask, changed)
+    size = len(lines)
+    src = [
+        "def kernel(grid):",
+        "    " + "".join(f"g{r}, " for r in range(size)) + "= grid",
+        "    gained = 0",
+        "    empty_mask = 0",
+        "    changed = False",
+    ]
+    for line in lines:
+        cells = "".join(f"g{r}[{c}], " for r, c, _ in line)
+        # zeros always trail a slid line, so its empty bits depend only on their count
+        tail_masks = tuple(sum(bit for _, _, bit in line[size - n:]) for n in range(size + 1))
+        src += [
+            f"    key = ({cells})",
+            "    result = get(key)",
+            "    if result is None:",
+            "        result = table[key] = slide(key)",
+            "    new_line, points = result",
+            "    gained += points",
+            "    if new_line != key:",
+            "        changed = True",
+            f"        {cells}= new_line",
+            f"    empty_mask |= {tail_masks!r}[new_line.count(0)]",
+        ]
+    src.append("    return gained, empty_mask, changed")
+    namespace = {"table": _LEFT_TABLE, "get": _LEFT_TABLE.get, "slide": _slide_left}
+    exec("\n".join(src), namespace)
+    return namespace["kernel"]
+
+# board size -> {direction: kernel}
+_MOVE_KERNELS = {}
+
 class Game2048:
+    __slots__ = ('size', 'score', 'game_over', 'grid', 'empty_mask', 'kernels', 'undo_stack', 'redo_stack')
+
+    HISTORY_LIMIT = 256
+
     def __init__(self, size=4):
         self.size = size
         self.score = 0
         self.game_over = False
         self.grid = [[0] * size for _ in range(size)]
+        self.empty_mask = (1 << (size * size)) - 1
+        self.kernels = self._get_kernels()
         
-        self.undo_stack = []
-        self.redo_stack = []
+        self.undo_stack = deque(maxlen=self.HISTORY_LIMIT)
+        self.redo_stack = deque(maxlen=self.HISTORY_LIMIT)
 
         self.add_new_tile()
         self.add_new_tile()
         self.save_state()
 
     def get_state(self):
-        return (copy.deepcopy(self.grid), self.score, self.game_over)
+        return (tuple(map(tuple, self.grid)), self.score, self.game_over)
 
     def set_state(self, state):
         grid, score, game_over = state
-        self.grid = grid
+        self.grid = [list(row) for row in grid]
+        self.empty_mask = self._scan_empty_mask()
         self.score = score
         self.game_over = game_over
 
@@ -34,8 +94,7 @@ class Game2048:
 
     def undo(self):
         if len(self.undo_stack) > 1:
-            self.redo_stack.append(self.get_state())
-            self.undo_stack.pop()
+            self.redo_stack.append(self.undo_stack.pop())
             last_state = self.undo_stack[-1]
             self.set_state(last_state)
             return True
@@ -45,76 +104,70 @@ class Game2048:
         if self.redo_stack:
             next_state = self.redo_stack.pop()
             self.set_state(next_state)
-            self.undo_stack.append(self.get_state())
+            self.undo_stack.append(next_state)
             return True
         return False
 
     def get_empty_cells(self):
         return [(r, c) for r in range(self.size) for c in range(self.size) if self.grid[r][c] == 0]
 
+    def _scan_empty_mask(self):
+        mask = 0
+        for r, c in self.get_empty_cells():
+            mask |= 1 << (r * self.size + c)
+        return mask
+
     def add_new_tile(self):
-        empty_cells = self.get_empty_cells()
-        if empty_cells:
-            r, c = random.choice(empty_cells)
+        mask = self.empty_mask
+        if mask:
+            # skip a random number of empty cells, then take the lowest one left
+            for _ in range(random.randrange(mask.bit_count())):
+                mask &= mask - 1
+            bit = mask & -mask
+            self.empty_mask ^= bit
+            r, c = divmod(bit.bit_length() - 1, self.size)
             self.grid[r][c] = 2 if random.random() < 0.9 else 4
 
-    def _compress(self, row):
-        new_row = [i for i in row if i != 0]
-        return new_row + [0] * (self.size - len(new_row))
-
-    def _merge(self, row):
-        row = self._compress(row)
-        for i in range(self.size - 1):
-            if row[i] != 0 and row[i] == row[i+1]:
-                row[i] *= 2
-                self.score += row[i]
-                row[i+1] = 0
-        return self._compress(row)
-
-    def _transpose(self):
-        self.grid = [list(t) for t in zip(*self.grid)]
-
-    def _reverse(self):
-        self.grid = [row[::-1] for row in self.grid]
+    def _get_kernels(self):
+        kernels = _MOVE_KERNELS.get(self.size)
+        if kernels is None:
+            kernels = _MOVE_KERNELS[self.size] = {
+                direction: _build_move_kernel(lines) for direction, lines in self._build_lines().items()
+            }
+        return kernels
+
+    def _build_lines(self):
+        def cell(r, c):
+            return (r, c, 1 << (r * self.size + c))
+        rows = [[cell(r, c) for c in range(self.size)] for r in range(self.size)]
+        cols = [[cell(r, c) for r in range(self.size)] for c in range(self.size)]
+        return {
+            'left': rows,
+            'right': [line[::-1] for line in rows],
+            'up': cols,
+            'down': [line[::-1] for line in cols],
+        }
 
     def move(self, direction):
-        if self.game_over:
+        if self.game_over or direction not in self.kernels:
             return False
 
-        original_grid = copy.deepcopy(self.grid)
-        moved = False
-
-        if direction == 'left':
-            self.grid = [self._merge(row) for row in self.grid]
-        elif direction == 'right':
-            self._reverse()
-            self.grid = [self._merge(row) for row in self.grid]
-            self._reverse()
-        elif direction == 'up':
-            self._transpose()
-            self.grid = [self._merge(row) for row in self.grid]
-            self._transpose()
-        elif direction == 'down':
-            self._transpose()
-            self._reverse()
-            self.grid = [self._merge(row) for row in self.grid]
-            self._reverse()
-            self._transpose()
-
-        if self.grid != original_grid:
-            moved = True
+        gained, self.empty_mask, moved = self.kernels[direction](self.grid)
+        self.score += gained
+
+        if moved:
             self.add_new_tile()
-            self.save_state()
             if not self.can_move():
                 self.game_over = True
+            self.save_state()
         return moved
     
     def can_move(self):
-        if self.get_empty_cells(): return True
-        for r in range(self.size):
-            for c in range(self.size):
-                if c < self.size - 1 and self.grid[r][c] == self.grid[r][c+1]: return True
-                if r < self.size - 1 and self.grid[r][c] == self.grid[r+1][c]: return True
+        if self.empty_mask: return True
+        for row in self.grid:
+            if any(a == b for a, b in zip(row, row[1:])): return True
+        for upper, lower in zip(self.grid, self.grid[1:]):
+            if any(a == b for a, b in zip(upper, lower)): return True
         return False
 
 class GameBoardWidget(QWidget):
@@ -128,50 +181,99 @@ class GameBoardWidget(QWidget):
         256: "#edcc61", 512: "#edc850", 1024: "#edc53f", 2048: "#edc22e",
         4096: "#3c3a32"
     }
+    LIGHT_TILE_VALUES = frozenset((2, 4))
 
     def __init__(self, game_instance):
         super().__init__()
         self.game = game_instance
         self.grid_pixel_size = self.game.size * self.CELL_SIZE + (self.game.size + 1) * self.CELL_PADDING
         self.setFixedSize(self.grid_pixel_size, self.grid_pixel_size)
+        self._drawn_grid = None
+        self._drawn_game_over = False
+
+        self._background_color = QColor("#bbada0")
+        self._fill_brushes = {value: QBrush(QColor(color)) for value, color in self.COLORS.items()}
+        self._text_pen_dark = QPen(QColor("#776e65"))
+        self._text_pen_light = QPen(QColor("#f9f6f2"))
+        self._game_over_brush = QBrush(QColor(238, 228, 218, 180))
+        self._game_over_font = QFont("Helvetica", 48, QFont.Weight.Bold)
+
+        # tile value -> pre-rendered tile, dropped when the device pixel ratio changes
+        self._tile_pixmaps = {}
+        self._pixmap_ratio = None
+
+    def cell_rect(self, r, c):
+        x = c * self.CELL_SIZE + (c + 1) * self.CELL_PADDING
+        y = r * self.CELL_SIZE + (r + 1) * self.CELL_PADDING
+        return QRect(x, y, self.CELL_SIZE, self.CELL_SIZE)
+
+    def refresh(self):
+        grid = tuple(map(tuple, self.game.grid))
+        game_over = self.game.game_over
+        if self._drawn_grid is None or game_over or self._drawn_game_over:
+            self.update()
+        else:
+            for r in range(self.game.size):
+                for c in range(self.game.size):
+                    if grid[r][c] != self._drawn_grid[r][c]:
+                        self.update(self.cell_rect(r, c))
+        self._drawn_grid = grid
+        self._drawn_game_over = game_over
+
+    def get_brush(self, value):
+        return self._fill_brushes.get(value, self._fill_brushes[4096])
+
+    def get_text_pen(self, value):
+        return self._text_pen_dark if value in self.LIGHT_TILE_VALUES else self._text_pen_light
+
+    def get_tile_pixmap(self, value):
+        pixmap = self._tile_pixmaps.get(value)
+        if pixmap is None:
+            ratio = self.devicePixelRatioF()
+            pixmap = QPixmap(round(self.CELL_SIZE * ratio), round(self.CELL_SIZE * ratio))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.GlobalColor.transparent)
+
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            rect = QRect(0, 0, self.CELL_SIZE, self.CELL_SIZE)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(self.get_brush(value))
+            painter.drawRoundedRect(rect, 5, 5)
 
-    def get_color(self, value):
-        return QColor(self.COLORS.get(value, self.COLORS[4096]))
+            if value != 0:
+                painter.setPen(self.get_text_pen(value))
+                painter.setFont(self.FONT)
+                painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, str(value))
+            painter.end()
 
-    def get_text_color(self, value):
-        return QColor("#776e65") if value in [2, 4] else QColor("#f9f6f2")
+            self._tile_pixmaps[value] = pixmap
+        return pixmap
 
     def paintEvent(self, event):
+        ratio = self.devicePixelRatioF()
+        if ratio != self._pixmap_ratio:
+            self._tile_pixmaps.clear()
+            self._pixmap_ratio = ratio
+
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.fillRect(self.rect(), QColor("#bbada0"))
+        dirty = event.rect()
+        painter.fillRect(dirty, self._background_color)
         
         for r in range(self.game.size):
             for c in range(self.game.size):
-                x = c * self.CELL_SIZE + (c + 1) * self.CELL_PADDING
-                y = r * self.CELL_SIZE + (r + 1) * self.CELL_PADDING
-                
-                value = self.game.grid[r][c]
-                color = self.get_color(value)
-                
-                painter.setPen(Qt.PenStyle.NoPen)
-                painter.setBrush(color)
-                painter.drawRoundedRect(x, y, self.CELL_SIZE, self.CELL_SIZE, 5, 5)
-
-                if value != 0:
-                    text_color = self.get_text_color(value)
-                    painter.setPen(QPen(text_color))
-                    painter.setFont(self.FONT)
-                    rect = QRect(x, y, self.CELL_SIZE, self.CELL_SIZE)
-                    painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, str(value))
+                rect = self.cell_rect(r, c)
+                if rect.intersects(dirty):
+                    painter.drawPixmap(rect.topLeft(), self.get_tile_pixmap(self.game.grid[r][c]))
         
         if self.game.game_over:
-            painter.setBrush(QColor(238, 228, 218, 180))
+            painter.setBrush(self._game_over_brush)
             painter.setPen(Qt.PenStyle.NoPen)
             painter.drawRect(self.rect())
             
-            painter.setPen(QColor("#776e65"))
-            painter.setFont(QFont("Helvetica", 48, QFont.Weight.Bold))
+            painter.setPen(self._text_pen_dark)
+            painter.setFont(self._game_over_font)
             painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "Game Over!")
 
 class GameGUI(QMainWindow):
@@ -213,7 +315,7 @@ class GameGUI(QMainWindow):
         self.score_label.setText(f"Score: {self.game.score}")
         self.undo_button.setEnabled(len(self.game.undo_stack) > 1)
         self.redo_button.setEnabled(bool(self.game.redo_stack))
-        self.board_widget.update()
+        self.board_widget.refresh()
 
     def keyPressEvent(self, event):
         if self.game.game_over: